@@ -10,101 +10,357 @@ Design Pattern: Strategy Pattern (AlertChannel interface).
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, TYPE_CHECKING
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from .logger import logger
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import httpx
+import atexit
+import queue
+import threading
+import orjson
 import os
-import base64
+
+# smtplib, email.mime and httpx are imported where first used, so API and
+# watcher processes that never raise an alert don't pay for them at startup.
+if TYPE_CHECKING:
+    import httpx
+
+# --- Environment Lookups ---
+# Credentials are read from the environment on every configure(); cache them.
+# Call refresh_env() after changing os.environ at runtime.
+_env_version = 0
+
+@lru_cache(maxsize=None)
+def _cached_env(name: str, default, version: int):
+    return os.getenv(name, default)
+
+def _getenv(name: str, default=None):
+    return _cached_env(name, default, _env_version)
+
+def refresh_env():
+    """Invalidate cached environment lookups."""
+    global _env_version
+    _env_version += 1
+
+# --- Alert Payload ---
+@dataclass(frozen=True)
+class AlertEnvelope:
+    """Everything a channel needs to send one alert, built once per failure batch."""
+    subject: str
+    message: str
+    filename: str
+    rule_name: str
+    error_count: int
+    details: Dict = field(default_factory=dict, hash=False, compare=False)
 
 # --- Abstract Base Strategy ---
 class AlertChannel(ABC):
     @abstractmethod
-    def send_alert(self, subject: str, message: str, details: Dict = None):
+    def send_alert(self, envelope: AlertEnvelope):
         """Send an alert through the specific channel implementation."""
         pass
 
+    def close(self):
+        """Release any connections held by the channel (no-op by default)."""
+        pass
+
+# --- SMTP Connection Pool ---
+class SmtpConnectionPool:
+    """
+    Bounded pool of logged-in SMTP sessions for one (server, port, user).
+    
+    Sessions are reused across alerts and recycled after `max_messages`
+    sends so long-lived connections are not cut off by provider limits.
+    Idle sessions are closed on interpreter shutdown.
+    """
+
+    def __init__(self, smtp_server: str, port: int, username: str, password: str,
+                 use_tls: bool = True, max_connections: int = 5, max_messages: int = 100):
+        self.key = (smtp_server, port, username)
+        self.smtp_server = smtp_server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages = max_messages
+        # Idle (session, messages_sent) tuples + a cap on sessions in use
+        self._idle = queue.Queue(maxsize=max_connections)
+        self._slots = threading.BoundedSemaphore(max_connections)
+        atexit.register(self.close)
+
+    def _open(self):
+        import smtplib
+        server = smtplib.SMTP(self.smtp_server, self.port)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    def _discard(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def acquire(self, timeout: float = 30.0):
+        """
+        Returns (session, messages_sent). Blocks while all sessions are in use.
+        Idle sessions are health-checked with NOOP before being handed out.
+        """
+        import smtplib
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No SMTP connection available in pool")
+        try:
+            while True:
+                try:
+                    server, sent = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open(), 0
+                try:
+                    server.noop()
+                    return server, sent
+                except (smtplib.SMTPException, OSError):
+                    self._discard(server)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, server, sent: int, broken: bool = False):
+        """Return a session to the pool, or drop it if broken or used up."""
+        try:
+            if broken or sent >= self.max_messages:
+                self._discard(server)
+            else:
+                try:
+                    self._idle.put_nowait((server, sent))
+                except queue.Full:
+                    self._discard(server)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close all idle sessions."""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(server)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        atexit.unregister(self.close)
+
 # --- Email Strategy ---
 class EmailChannel(AlertChannel):
     """Sends alerts via SMTP."""
     
-    def __init__(self, smtp_server="smtp.gmail.com", port=587, use_tls=True):
-        self.smtp_server = os.getenv("SMTP_SERVER", smtp_server)
-        self.port = int(os.getenv("SMTP_PORT", port))
+    def __init__(self, smtp_server="smtp.gmail.com", port=587, use_tls=True, bcc_mode=False):
+        self.smtp_server = _getenv("SMTP_SERVER", smtp_server)
+        self.port = int(_getenv("SMTP_PORT", port))
         self.use_tls = use_tls
-        self.username = os.getenv("SMTP_USER")
-        self.password = os.getenv("SMTP_PASSWORD")
+        # Send one message with all recipients as BCC instead of one per recipient
+        self.bcc_mode = bcc_mode
+        self.username = _getenv("SMTP_USER")
+        self.password = _getenv("SMTP_PASSWORD")
         # Recipients loaded from Config or Env
         self.recipients = []
+        # Shared pool (set by AlertManager); a private one is created if missing
+        self.pool = None
+        self._owns_pool = False
 
-    def send_alert(self, subject: str, message: str, details: Dict = None):
-        logger.info(f"[EMAIL] Preparing to send email: {subject}")
+    def _get_pool(self) -> SmtpConnectionPool:
+        if self.pool is None:
+            self.pool = SmtpConnectionPool(self.smtp_server, self.port, self.username,
+                                           self.password, use_tls=self.use_tls)
+            self._owns_pool = True
+        return self.pool
+
+    def close(self):
+        if self._owns_pool and self.pool is not None:
+            self.pool.close()
+            # Drop its exit hook too, or every reconfigure leaks one (and the pool)
+            atexit.unregister(self.pool.close)
+            self.pool = None
+            self._owns_pool = False
+
+    def _send_bcc(self, pool: SmtpConnectionPool, msg, recipients: List[str]) -> List[str]:
+        """
+        Sends a single message addressed to all recipients via RCPT TO (BCC).
+        Returns the recipients that still need per-recipient delivery.
+        """
+        import smtplib
+        msg['To'] = self.username
+        try:
+            server, sent = pool.acquire()
+        except Exception as e:
+            logger.warning(f"[EMAIL] BCC send failed, falling back to per-recipient: {e}")
+            return recipients
+
+        broken = False
+        try:
+            refused = server.send_message(msg, to_addrs=recipients)
+            sent += 1
+        except smtplib.SMTPServerDisconnected as e:
+            broken = True
+            logger.warning(f"[EMAIL] BCC send failed, falling back to per-recipient: {e}")
+            return recipients
+        except Exception as e:
+            logger.warning(f"[EMAIL] BCC send failed, falling back to per-recipient: {e}")
+            return recipients
+        finally:
+            pool.release(server, sent, broken=broken)
+
+        delivered = len(recipients) - len(refused)
+        logger.info(f"[EMAIL] Sent successfully to {delivered} recipients (BCC)")
+        return [r for r in recipients if r in refused]
+
+    def send_alert(self, envelope: AlertEnvelope):
+        logger.info(f"[EMAIL] Preparing to send email: {envelope.subject}")
         
         if not self.username or not self.password:
             logger.warning("[EMAIL] SMTP credentials missing. Skipping email send.")
             return
+
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
         
         # Ensure list format
         recipients_list = self.recipients if isinstance(self.recipients, list) else [self.recipients]
+        pool = self._get_pool()
+        server, sent = None, 0
+
+        # Body and headers are identical for every recipient: build once, swap 'To'
+        msg = MIMEMultipart()
+        msg['From'] = self.username
+        msg['Subject'] = envelope.subject
+        msg.attach(MIMEText(envelope.message, 'plain'))
+
+        if self.bcc_mode and len(recipients_list) > 1:
+            recipients_list = self._send_bcc(pool, msg, recipients_list)
         
-        for recipient in recipients_list:
-            try:
-                msg = MIMEMultipart()
-                msg['From'] = self.username
+        try:
+            for recipient in recipients_list:
+                del msg['To']
                 msg['To'] = recipient
-                msg['Subject'] = subject
-                msg.attach(MIMEText(message, 'plain'))
-                
-                with smtplib.SMTP(self.smtp_server, self.port) as server:
-                    if self.use_tls:
-                        server.starttls()
-                    server.login(self.username, self.password)
-                    server.send_message(msg)
-                    
-                logger.info(f"[EMAIL] Sent successfully to {recipient}")
-            except Exception as e:
-                logger.error(f"[EMAIL] Failed to send to {recipient}: {e}")
+
+                try:
+                    if server is None:
+                        server, sent = pool.acquire()
+                    try:
+                        server.send_message(msg)
+                    except smtplib.SMTPServerDisconnected:
+                        # Session dropped mid-batch: reconnect once and retry
+                        pool.release(server, sent, broken=True)
+                        server = None
+                        server, sent = pool.acquire()
+                        server.send_message(msg)
+                    sent += 1
+
+                    # Recycle sessions that hit the per-connection cap
+                    if sent >= pool.max_messages:
+                        pool.release(server, sent)
+                        server = None
+                        
+                    logger.info(f"[EMAIL] Sent successfully to {recipient}")
+                except Exception as e:
+                    logger.error(f"[EMAIL] Failed to send to {recipient}: {e}")
+        finally:
+            if server is not None:
+                pool.release(server, sent)
 
 # --- ServiceNow Strategy ---
+def _env_proxy_for(url: str):
+    """
+    Proxy URL the environment selects for `url` (HTTP(S)_PROXY / ALL_PROXY,
+    honouring NO_PROXY), or None for a direct connection.
+    httpx only applies these itself when it builds its own transport.
+    """
+    from urllib.parse import urlsplit
+    from urllib.request import getproxies, proxy_bypass
+
+    parts = urlsplit(url)
+    proxies = getproxies()
+    proxy = proxies.get(parts.scheme) or proxies.get("all")
+    if not proxy or not parts.hostname or proxy_bypass(parts.hostname):
+        return None
+    # Like httpx, accept scheme-less values such as "proxy.corp:8080"
+    return proxy if "://" in proxy else f"http://{proxy}"
+
 class ServiceNowChannel(AlertChannel):
     """Creates Incidents in ServiceNow via Table API."""
     
     def __init__(self, instance_url=None, username=None, password=None):
-        self.instance_url = instance_url or os.getenv("SNOW_INSTANCE_URL")
-        self.username = username or os.getenv("SNOW_USER")
-        self.password = password or os.getenv("SNOW_PASSWORD")
+        self.instance_url = instance_url or _getenv("SNOW_INSTANCE_URL")
+        self.username = username or _getenv("SNOW_USER")
+        self.password = password or _getenv("SNOW_PASSWORD")
+        # Persistent client so incidents reuse the keep-alive TLS connection
+        self._client = None
+
+    @property
+    def credentials(self):
+        return (self.instance_url, self.username, self.password)
+
+    def _get_client(self) -> "httpx.Client":
+        if self._client is None:
+            import httpx
+            self._client = httpx.Client(
+                base_url=self.instance_url.rstrip('/'),
+                auth=(self.username, self.password),
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "application/json"
+                },
+                timeout=httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0),
+                # Connection retries (with backoff) live on the shared transport,
+                # so the keep-alive pool is preserved across alerts. An explicit
+                # transport bypasses httpx's env proxy handling, so pass it on here.
+                transport=httpx.HTTPTransport(
+                    proxy=_env_proxy_for(self.instance_url),
+                    retries=3,
+                    limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=60)
+                )
+            )
+            atexit.register(self.close)
+        return self._client
+
+    def close(self):
+        if self._client is None:
+            return
+        self._client.close()
+        self._client = None
+        atexit.unregister(self.close)
         
-    def send_alert(self, subject: str, message: str, details: Dict = None):
-        logger.info(f"[SERVICENOW] Preparing to create incident: {subject}")
+    def send_alert(self, envelope: AlertEnvelope):
+        logger.info(f"[SERVICENOW] Preparing to create incident: {envelope.subject}")
         
         if not self.instance_url or not self.username or not self.password:
             logger.warning("[SERVICENOW] Credentials missing. Skipping.")
             return
 
-        api_url = f"{self.instance_url.rstrip('/')}/api/now/table/incident"
+        import httpx
         
-        payload = {
-            "short_description": subject,
-            "description": message,
+        # Serialized once with orjson; httpx sends the bytes as-is
+        payload = orjson.dumps({
+            "short_description": envelope.subject,
+            "description": envelope.message,
             "category": "Software",
             "priority": "2" # Medium/High Priority
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        })
 
         try:
-            response = httpx.post(
-                api_url, 
-                auth=(self.username, self.password), 
-                headers=headers, 
-                json=payload,
-                timeout=10.0
-            )
+            response = self._get_client().post("/api/now/table/incident", content=payload)
             
             if response.status_code == 201:
                 data = response.json()
@@ -113,7 +369,7 @@ class ServiceNowChannel(AlertChannel):
             else:
                 logger.error(f"[SERVICENOW] Failed. HTTP {response.status_code}: {response.text}")
                 
-        except Exception as e:
+        except httpx.HTTPError as e:
             logger.error(f"[SERVICENOW] Connection Exception: {e}")
 
 # --- Coordinator ---
@@ -125,6 +381,12 @@ class AlertManager:
     
     def __init__(self):
         self.channels: List[AlertChannel] = []
+        self.smtp_pool: SmtpConnectionPool = None
+        # Last applied (email, servicenow) settings, see configure()
+        self._settings = None
+        # Parallel channel dispatch for sync callers
+        self._dispatch = ThreadPoolExecutor(max_workers=4, thread_name_prefix="alert")
+        atexit.register(self._dispatch.shutdown)
         # Initial registration (will be overwritten by configure())
         self.register_channel(EmailChannel())
 
@@ -135,59 +397,130 @@ class AlertManager:
         """
         Dynamically configures channels based on JSON config.
         Allows changing recipients or credentials without restart.
+        No-op when the resolved settings are unchanged, so pooled
+        connections survive the engine's per-file config reload.
         """
-        self.channels = [] # Reset
-        
-        # 1. Configure Email
         smtp_conf = config.get("smtp_config", {})
         recipients = config.get("email_recipients", [])
-        
+        snow_conf = config.get("servicenow", {})
+
+        # 1. Resolve Email settings
+        email_settings = None
         if smtp_conf or recipients:
-             server = smtp_conf.get("server", os.getenv("SMTP_SERVER", "smtp.gmail.com"))
-             port = smtp_conf.get("port", int(os.getenv("SMTP_PORT", 587)))
-             user = smtp_conf.get("sender_email", os.getenv("SMTP_USER"))
-             password = smtp_conf.get("sender_password", os.getenv("SMTP_PASSWORD"))
-             
-             channel = EmailChannel(smtp_server=server, port=port)
+            email_settings = (
+                smtp_conf.get("server", _getenv("SMTP_SERVER", "smtp.gmail.com")),
+                smtp_conf.get("port", int(_getenv("SMTP_PORT", 587))),
+                smtp_conf.get("sender_email", _getenv("SMTP_USER")),
+                smtp_conf.get("sender_password", _getenv("SMTP_PASSWORD")),
+                # Fallback to env var if config recipient is empty
+                tuple(recipients) if recipients else (_getenv("ALERT_EMAIL_RECIPIENT", "admin@example.com"),),
+                bool(smtp_conf.get("bcc_mode", False)),
+            )
+
+        # 2. Resolve ServiceNow settings
+        snow_settings = None
+        if snow_conf:
+            snow_settings = (
+                snow_conf.get("instance_url", _getenv("SNOW_INSTANCE_URL")),
+                snow_conf.get("username", _getenv("SNOW_USER")),
+                snow_conf.get("password", _getenv("SNOW_PASSWORD")),
+            )
+
+        settings = (email_settings, snow_settings)
+        if settings == self._settings:
+            return
+        self._settings = settings
+
+        previous = self.channels
+        self.channels = [] # Reset
+        
+        if email_settings:
+             server, port, user, password, recipient_list, bcc_mode = email_settings
+             channel = EmailChannel(smtp_server=server, port=port, bcc_mode=bcc_mode)
              channel.username = user
              channel.password = password
-             # Fallback to env var if config recipient is empty
-             channel.recipients = recipients if recipients else [os.getenv("ALERT_EMAIL_RECIPIENT", "admin@example.com")]
+             channel.pool = self._get_smtp_pool(channel)
+             channel.recipients = list(recipient_list)
              
              self.register_channel(channel)
              
-        # 2. Configure ServiceNow
-        snow_conf = config.get("servicenow", {})
-        if snow_conf:
-            instance = snow_conf.get("instance_url", os.getenv("SNOW_INSTANCE_URL"))
-            user = snow_conf.get("username", os.getenv("SNOW_USER"))
-            password = snow_conf.get("password", os.getenv("SNOW_PASSWORD"))
-            
-            channel = ServiceNowChannel(instance_url=instance, username=user, password=password)
+        if snow_settings:
+            # Keep the existing channel (and its open connection) if nothing changed
+            channel = next((c for c in previous if isinstance(c, ServiceNowChannel)
+                            and c.credentials == snow_settings), None)
+            if channel is None:
+                channel = ServiceNowChannel(*snow_settings)
             self.register_channel(channel)
 
+        # Close channels that were replaced so connections are not leaked
+        for channel in previous:
+            if channel not in self.channels:
+                channel.close()
+
+    def _get_smtp_pool(self, channel: EmailChannel) -> SmtpConnectionPool:
+        """
+        Returns the shared SMTP pool, rebuilding it only when the
+        server, port, or credentials have changed.
+        """
+        key = (channel.smtp_server, channel.port, channel.username)
+        pool = self.smtp_pool
+        if pool is None or pool.key != key or pool.password != channel.password:
+            if pool is not None:
+                pool.__exit__(None, None, None)
+            self.smtp_pool = SmtpConnectionPool(channel.smtp_server, channel.port, channel.username,
+                                                channel.password, use_tls=channel.use_tls)
+        return self.smtp_pool
+
+    def _build_alert(self, filename: str, rule_name: str, failures: List[Dict]) -> AlertEnvelope:
+        """Constructs the envelope shared by all channels."""
+        base = os.path.basename(filename)
+        error_count = len(failures)
+        subject = f"File Validation Failure: {base}"
+        parts = [
+            f"File: {base}",
+            f"Ruleset: {rule_name}",
+            f"Total Errors: {error_count}",
+            "",
+            "--- Sample Errors ---",
+        ]
+        # islice avoids copying the head of a potentially huge failure list
+        parts.extend(
+            f"Row {fail.get('row', 'N/A')}: {fail.get('message', 'Unknown issue')}"
+            for fail in islice(failures, 10)
+        )
+            
+        extra = error_count - 10
+        parts.append(f"...and {extra} more errors." if extra > 0 else "")
+        message = "\n".join(parts)
+            
+        details = {"filename": filename, "error_count": error_count}
+        return AlertEnvelope(
+            subject=subject,
+            message=message,
+            filename=base,
+            rule_name=rule_name,
+            error_count=error_count,
+            details=details,
+        )
+
     def trigger_alert(self, filename: str, rule_name: str, failures: List[Dict]):
         """
         Constructs a formatted alert message and broadcasts it.
+        Channels are dispatched in parallel on a thread pool so Email and
+        ServiceNow I/O overlap.
         """
         if not failures:
             return
 
-        subject = f"File Validation Failure: {os.path.basename(filename)}"
-        message = f"File: {os.path.basename(filename)}\n"
-        message += f"Ruleset: {rule_name}\n"
-        message += f"Total Errors: {len(failures)}\n\n"
-        message += "--- Sample Errors ---\n"
-        
-        for fail in failures[:10]:
-            row = fail.get('row', 'N/A')
-            msg = fail.get('message', 'Unknown issue')
-            message += f"Row {row}: {msg}\n"
-            
-        if len(failures) > 10:
-            message += f"...and {len(failures) - 10} more errors."
-            
-        details = {"filename": filename, "error_count": len(failures)}
+        envelope = self._build_alert(filename, rule_name, failures)
+        list(self._dispatch.map(lambda c: self._send_safely(c, envelope), self.channels))
 
-        for channel in self.channels:
-            channel.send_alert(subject, message, details)
+    def _send_safely(self, channel: AlertChannel, envelope: AlertEnvelope):
+        """
+        Send on one channel. Errors are logged here so a broken channel never
+        changes the validation result or stops the other channels.
+        """
+        try:
+            channel.send_alert(envelope)
+        except Exception as e:
+            logger.error(f"[ALERT] {type(channel).__name__} failed: {type(e).__name__}: {e}")
@@ -9,20 +9,66 @@ Exposes a RESTful API for:
 Run with: uvicorn src.validator.api:app --reload
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from functools import lru_cache
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from .config_manager import ConfigManager
-from .engine import ValidationEngine
+from .engine import run_in_worker
+from concurrent.futures import ProcessPoolExecutor
 from .logger import logger
+import asyncio
+import io
 import os
+import time
+import uuid
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (much faster than stdlib json)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# --- Output Directories ---
+PROCESSED_DIR = "processed"
+REJECTED_DIR = "rejected"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    # Created once at startup so the polling endpoints don't re-check on every hit
+    for d in (PROCESSED_DIR, REJECTED_DIR):
+        os.makedirs(d, exist_ok=True)
+
+    # Sync endpoints, StaticFiles and to_thread calls share anyio's threadpool.
+    # That work is I/O-bound (CPU-bound validation runs in the process pool
+    # below), so never go under anyio's default of 40; scale up on big hosts.
+    to_thread.current_default_thread_limiter().total_tokens = max(40, 5 * (os.cpu_count() or 1))
+
+    # CPU-bound validations run in worker processes, off the event loop
+    app.state.pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    yield
+    app.state.pool.shutdown(wait=True, cancel_futures=True)
+    # Persist any write-behind config edits still pending
+    config_manager.flush()
+
 
 # Initialize app with metadata
 app = FastAPI(
     title="Real-Time File Validation System API",
     description="Backend for managing rules, routing, and monitoring file validation.",
-    version="5.0"
+    version="5.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # --- Static Asset Serving (Dashboard) ---
@@ -35,7 +81,23 @@ app.mount("/dashboard", StaticFiles(directory=static_dir, html=True), name="stat
 
 # --- Core Dependencies ---
 config_manager = ConfigManager()
-validation_engine = ValidationEngine()
+
+
+# --- Response Caching ---
+# Dashboard polls these endpoints every few seconds; responses are memoized
+# and invalidated whenever the config changes (ConfigManager.version).
+
+@lru_cache(maxsize=16)
+def _config_view(view: str, version: int, name: Optional[str] = None):
+    """Memoized read-only views of the config, keyed on config version."""
+    if view == "rulesets":
+        # Pre-serialized once so repeat hits skip JSON encoding entirely
+        return orjson.dumps(config_manager.config.get("rulesets", {}))
+    if view == "ruleset":
+        return config_manager.get_ruleset(name)
+    if view == "routes":
+        return config_manager.get_routes()
+    raise ValueError(f"Unknown config view: {view}")
 
 
 # --- Pydantic Models (Request Validation) ---
@@ -55,7 +117,7 @@ class ValidationRequest(BaseModel):
 # --- API Endpoints ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Health Check Endpoint"""
     return {"status": "active", "system": "Validator V5", "version": "5.0"}
 
@@ -63,17 +125,23 @@ def read_root():
 def get_stats():
     """
     Returns system telemetry calculated from the file system.
+    Cached for 1 second to absorb dashboard polling bursts.
     """
-    processed_dir = "processed"
-    rejected_dir = "rejected"
-    
-    # Ensure dirs exist to avoid errors
-    if not os.path.exists(processed_dir): os.makedirs(processed_dir)
-    if not os.path.exists(rejected_dir): os.makedirs(rejected_dir)
-    
+    return _stats_snapshot(int(time.monotonic()))
+
+def _count_files(path: str) -> int:
+    """Count regular files in a directory with a single scandir pass."""
+    try:
+        with os.scandir(path) as it:
+            return sum(1 for entry in it if entry.is_file())
+    except FileNotFoundError:
+        return 0
+
+@lru_cache(maxsize=1)
+def _stats_snapshot(second: int):
     # Count files (excluding directories)
-    count_processed = len([name for name in os.listdir(processed_dir) if os.path.isfile(os.path.join(processed_dir, name))])
-    count_rejected = len([name for name in os.listdir(rejected_dir) if os.path.isfile(os.path.join(rejected_dir, name))])
+    count_processed = _count_files(PROCESSED_DIR)
+    count_rejected = _count_files(REJECTED_DIR)
     
     total = count_processed + count_rejected
     if total > 0:
@@ -92,21 +160,46 @@ def get_stats():
         }
     }
 
+def tail(path: str, n: int = 50, block_size: int = 8192) -> List[str]:
+    """
+    Return the last `n` lines of a file.
+    Reads backwards from the end in growing blocks, so cost is bounded by
+    the size of the tail rather than the size of the file.
+    """
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        block = block_size
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            data = f.read(size - start)
+            # n + 1 newlines guarantees n complete lines even if we started mid-line
+            if start == 0 or data.count(b"\n") > n:
+                break
+            block *= 2
+    text = data.decode("utf-8", errors="replace")
+    return io.StringIO(text, newline=None).readlines()[-n:]
+
 @app.get("/logs")
-def get_logs():
+async def get_logs(request: Request):
     """
     Stream the last 50 lines of the application log file.
     Used by the dashboard 'Live Logs' widget.
+    Supports If-None-Match so unchanged logs return 304.
     """
     log_file = "validator.log"
-    if not os.path.exists(log_file):
+    try:
+        stats = os.stat(log_file)
+    except FileNotFoundError:
         return {"logs": ["Log file not found."]}
+
+    etag = f'"{stats.st_size:x}-{stats.st_mtime_ns:x}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
     
     try:
-        with open(log_file, "r") as f:
-            lines = f.readlines()
-            # Return last 50 lines, reversed for newest-first
-            return {"logs": lines[-50:]}
+        lines = await asyncio.to_thread(tail, log_file, 50)
+        return ORJSONResponse({"logs": lines}, headers={"ETag": etag})
     except Exception as e:
         logger.error(f"Error reading logs: {e}")
         return {"logs": [f"Error reading logs: {str(e)}"]}
@@ -114,15 +207,16 @@ def get_logs():
 # --- Ruleset Management ---
 
 @app.get("/rulesets")
-def get_rulesets():
+async def get_rulesets():
     """List all configured validation rulesets."""
     logger.info("API: Fetching all rulesets")
-    return config_manager.config.get("rulesets", {})
+    content = _config_view("rulesets", config_manager.version)
+    return Response(content=content, media_type="application/json")
 
 @app.get("/rulesets/{name}")
-def get_ruleset(name: str):
+async def get_ruleset(name: str):
     """Get a specific ruleset by name."""
-    rules = config_manager.get_ruleset(name)
+    rules = _config_view("ruleset", config_manager.version, name)
     if not rules:
         raise HTTPException(status_code=404, detail="Ruleset not found")
     return {"name": name, "rules": rules}
@@ -137,9 +231,9 @@ def create_update_ruleset(name: str, rules: List[str]):
 # --- Routing Management ---
 
 @app.get("/routes")
-def get_routes():
+async def get_routes():
     """List all file routing patterns."""
-    return config_manager.get_routes()
+    return _config_view("routes", config_manager.version)
 
 @app.post("/routes")
 def create_route(route: Route):
@@ -150,20 +244,95 @@ def create_route(route: Route):
 
 # --- Execution ---
 
+def _log_validation_result(future):
+    """Done-callback for pooled validations: surface worker crashes in the log."""
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        logger.error(f"Validation worker failed: {exc}")
+
+# Recent validation jobs: job_id -> (filepath, future). Oldest handles are dropped first.
+MAX_JOBS = 1024
+MAX_STATUS_WAIT = 30  # seconds
+_jobs = OrderedDict()
+
+EXISTS_TTL = 5  # seconds
+# path -> EXISTS_TTL time bucket in which it was last seen to exist
+_exists_hits = {}
+
+def _exists_cached(path: str, bucket: int) -> bool:
+    """
+    os.path.exists, with hits remembered for one EXISTS_TTL time bucket.
+    Misses are never cached: a file that lands right after a 404 is found
+    on the very next request.
+    """
+    if _exists_hits.get(path) == bucket:
+        return True
+    if not os.path.exists(path):
+        return False
+    if len(_exists_hits) >= 4096:
+        _exists_hits.clear()
+    _exists_hits[path] = bucket
+    return True
+
 @app.post("/validate")
-def validate_file(request: ValidationRequest, background_tasks: BackgroundTasks):
+async def validate_file(request: ValidationRequest):
     """
     Manual Trigger: Force validation of a specific file.
-    Runs validation in a background thread to prevent API blocking.
+    Runs validation in a worker process so multiple requests use multiple cores.
     """
     logger.info(f"API: Manual validation requested for {request.filepath}")
     
-    if not os.path.exists(request.filepath):
+    # Repeat requests for a file that exists skip the stat for a few seconds;
+    # a stale positive just makes the worker log a read error.
+    bucket = int(time.monotonic()) // EXISTS_TTL
+    if not await asyncio.to_thread(_exists_cached, request.filepath, bucket):
         raise HTTPException(status_code=404, detail="File not found on server")
 
-    # Dispatch to engine
-    background_tasks.add_task(validation_engine.process_file, request.filepath)
-    return {"message": "Validation scheduled", "filepath": request.filepath}
+    # Workers read config.json from disk: persist any write-behind edits first,
+    # so a ruleset/route posted just before this request is in effect
+    await asyncio.to_thread(config_manager.flush)
+
+    # Dispatch to engine (per-process instance, see engine.run_in_worker)
+    future = app.state.pool.submit(run_in_worker, request.filepath)
+    future.add_done_callback(_log_validation_result)
+
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = (request.filepath, future)
+    if len(_jobs) > MAX_JOBS:
+        _jobs.popitem(last=False)
+    return {"message": "Validation scheduled", "filepath": request.filepath, "job_id": job_id}
+
+@app.get("/validate/status/{job_id}")
+async def validation_status(job_id: str, wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT)):
+    """
+    Status of a job started by /validate.
+    With ?wait=N the request blocks (up to N seconds) until the job finishes,
+    so clients don't need to sleep and poll.
+    result is the engine's verdict: true (passed), false (failed), null (skipped).
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown validation job")
+    filepath, future = job
+
+    if wait and not future.done():
+        # asyncio.wait (unlike wait_for) never cancels the pool job on timeout
+        await asyncio.wait([asyncio.wrap_future(future)], timeout=wait)
+
+    status = {"job_id": job_id, "filepath": filepath}
+    if not future.done():
+        status["status"] = "pending"
+    elif future.cancelled():
+        status["status"] = "cancelled"
+    elif future.exception() is not None:
+        status["status"] = "error"
+        status["detail"] = str(future.exception())
+    else:
+        status["status"] = "done"
+        status["result"] = future.result()
+    return status
 
 @app.get("/files/{category}")
 def list_files(category: str):
@@ -178,17 +347,17 @@ def list_files(category: str):
         return {"files": []}
         
     try:
-        # Get files with timestamp
+        # Get files with timestamp (DirEntry caches type and stat info)
         files = []
-        for f in os.listdir(target_dir):
-            full_path = os.path.join(target_dir, f)
-            if os.path.isfile(full_path):
-                stats = os.stat(full_path)
-                files.append({
-                    "name": f,
-                    "size": stats.st_size,
-                    "modified": stats.st_mtime
-                })
+        with os.scandir(target_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    stats = entry.stat()
+                    files.append({
+                        "name": entry.name,
+                        "size": stats.st_size,
+                        "modified": stats.st_mtime
+                    })
         
         # Sort by newest first
         files.sort(key=lambda x: x["modified"], reverse=True)
@@ -5,19 +5,36 @@ Handles loading, saving, and querying of system configuration.
 Persists state in 'config.json'.
 """
 
+import atexit
 import json
 import os
+import re
+import threading
+import orjson
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Pattern, Tuple
+
+# Constructs that break when patterns are combined: numbered backreferences,
+# conditionals, and inline global flags like (?i), which would otherwise apply
+# to every route in the alternation (Python <= 3.10 only warns about them)
+_GROUP_REF = re.compile(r"\\[1-9]|\(\?\(|\(\?[aiLmsux]+\)")
 
 class ConfigManager:
     """
     Interface for 'config.json'.
     Methods are thread-safe enough for our usage (single writer via API, mostly readers).
+    Writes are write-behind: mutations mark the config dirty and a short
+    debounce timer coalesces bursts of edits into one disk write.
     """
     
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", flush_delay: float = 0.2):
         self.config_path = config_path
+        self.flush_delay = flush_delay
+        # Bumped on every in-memory change; lets callers cache derived views
+        self.version = 0
+        self._dirty = False
+        self._flush_timer = None
+        self._lock = threading.RLock()
         self.config = {
             "version": "1.0",
             "last_updated": datetime.now().isoformat(),
@@ -25,31 +42,80 @@ class ConfigManager:
             "rulesets": {},
             "system_config": {}
         }
+        # Compiled route patterns, rebuilt lazily after the routes change
+        self._compiled_routes = None
+        self._route_matcher = None
+        # (mtime, size, inode) of the file as last read; unchanged -> skip the reparse
+        self._file_stamp = None
         self.load_config()
+        atexit.register(self.flush)
 
     def load_config(self):
-        """Reload configuration from disk."""
-        if os.path.exists(self.config_path):
-            try:
-                with open(self.config_path, 'r') as f:
-                    self.config = json.load(f)
-            except Exception as e:
-                print(f"[Config] Error loading file: {e}")
-
-    def save_config(self):
-        """Persist current configuration to disk."""
-        self.config["last_updated"] = datetime.now().isoformat()
+        """Reload configuration from disk (skipped if the file is untouched)."""
+        # Never clobber edits that haven't hit the disk yet
+        self.flush()
+        try:
+            st = os.stat(self.config_path)
+        except OSError:
+            return
+        # Stamp taken before reading, so a write racing the read forces a reload next time
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp == self._file_stamp:
+            return
         try:
-            with open(self.config_path, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            with open(self.config_path, 'rb') as f:
+                loaded = orjson.loads(f.read())
+            self._file_stamp = stamp
+            with self._lock:
+                # Unchanged file: keep the version so derived caches stay valid
+                if loaded == self.config:
+                    return
+                previous_routes = self.config.get("routes")
+                self.config = loaded
+                self.version += 1
+                if self.config.get("routes") != previous_routes:
+                    self._compiled_routes = None
         except Exception as e:
-            print(f"[Config] Error saving file: {e}")
+            print(f"[Config] Error loading file: {e}")
+
+    def save_config(self):
+        """Schedule the current configuration to be persisted to disk."""
+        with self._lock:
+            self.config["last_updated"] = datetime.now().isoformat()
+            self.version += 1
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now (no-op if nothing changed)."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            try:
+                # Same 4-space layout as before: config.json is also edited by hand.
+                # (Reads use orjson; this debounced write isn't on a hot path.)
+                text = json.dumps(self.config, indent=4) + "\n"
+                with open(self.config_path, 'w') as f:
+                    f.write(text)
+            except Exception as e:
+                print(f"[Config] Error saving file: {e}")
 
     # --- Ruleset Operations ---
     def add_ruleset(self, name: str, rules: List[str]):
         """Define a new validation ruleset."""
-        self.config["rulesets"][name] = rules
-        self.save_config()
+        with self._lock:
+            # Re-posting an identical ruleset is a no-op: no timestamp bump, no write
+            if self.config["rulesets"].get(name) == rules:
+                return
+            self.config["rulesets"][name] = rules
+            self.save_config()
 
     def get_ruleset(self, name: str) -> List[str]:
         return self.config["rulesets"].get(name, [])
@@ -60,25 +126,76 @@ class ConfigManager:
         Map a filename pattern to a ruleset.
         Overwrites existing routes with the same pattern.
         """
-        # Filter out existing with same pattern
-        self.config["routes"] = [r for r in self.config["routes"] if r["pattern"] != pattern]
-        
-        self.config["routes"].append({
+        route = {
             "pattern": pattern,
             "ruleset": ruleset_name,
             "priority": priority
-        })
-        # Keep sorted by priority
-        self.config["routes"].sort(key=lambda x: x["priority"], reverse=True)
-        self.save_config()
+        }
+        with self._lock:
+            if route in self.config["routes"]:
+                return
+            # Filter out existing with same pattern
+            self.config["routes"] = [r for r in self.config["routes"] if r["pattern"] != pattern]
+            
+            self.config["routes"].append(route)
+            # Keep sorted by priority
+            self.config["routes"].sort(key=lambda x: x["priority"], reverse=True)
+            self._compiled_routes = None
+            self.save_config()
 
     def get_routes(self) -> List[Dict]:
         return self.config["routes"]
 
+    def iter_compiled_routes(self) -> Iterator[Tuple[Pattern, Dict]]:
+        """
+        Yield (compiled_pattern, route) pairs in config order
+        (add_route keeps that sorted by priority).
+        Patterns are compiled once and reused until the routes change.
+        """
+        if self._compiled_routes is None:
+            self._compile_routes()
+        return iter(self._compiled_routes)
+
+    def route_matcher(self) -> Optional[Tuple[Pattern, List[Tuple[Pattern, Dict]]]]:
+        """
+        Return (combined_pattern, compiled_routes), or None if the routes
+        can't be combined. A single combined.match(filename) finds the
+        first route (in config order) whose pattern would search() the filename;
+        its index is the number in the winning group name (_r<index>).
+        """
+        if self._compiled_routes is None:
+            self._compile_routes()
+        return self._route_matcher
+
+    def _compile_routes(self):
+        # Config order, like the original per-route loop (add_route keeps it by priority)
+        routes = list(self.config["routes"])
+        compiled = [(re.compile(r["pattern"]), r) for r in routes]
+
+        # One alternation, tried in route order. The lazy prefix makes each
+        # branch behave like search() on its own pattern. Patterns matched by
+        # _GROUP_REF, or that clash once combined, keep the loop.
+        matcher = None
+        patterns = [r["pattern"] for r in routes]
+        if patterns and not any(_GROUP_REF.search(p) for p in patterns):
+            try:
+                combined = re.compile("|".join(
+                    f"(?P<_r{i}>(?s:.*?)(?:{p}))" for i, p in enumerate(patterns)
+                ))
+                matcher = (combined, compiled)
+            except re.error:
+                pass
+
+        self._route_matcher = matcher
+        self._compiled_routes = compiled
+
     # --- System Config Operations ---
     def set_system_config(self, config: Dict):
-        self.config["system_config"] = config
-        self.save_config()
+        with self._lock:
+            if self.config.get("system_config") == config:
+                return
+            self.config["system_config"] = config
+            self.save_config()
 
     def get_system_config(self) -> Dict:
         return self.config.get("system_config", {})
@@ -18,7 +18,10 @@ Last Updated: Jan 2026
 
 import ply.lex as lex
 import ply.yacc as yacc
+import copy
+import operator as op
 import re
+import threading
 
 # =============================================
 # LEXER - Token Definitions
@@ -70,61 +73,19 @@ t_LPAREN = r"\("
 t_RPAREN = r"\)"
 t_ignore = " \t" # Ignore spaces and tabs
 
-# --- Keyword Token Functions (Case Insensitive) ---
-def t_IS(t):
-    r"[Ii][Ss]"
-    return t
-
-def t_BETWEEN(t):
-    r"[Bb][Ee][Tt][Ww][Ee][Ee][Nn]"
-    return t
-
-def t_AND(t):
-    r"[Aa][Nn][Dd]"
-    return t
-
-def t_MATCHES(t):
-    r"[Mm][Aa][Tt][Cc][Hh][Ee][Ss]"
-    return t
-
-def t_CONTAINS(t):
-    r"[Cc][Oo][Nn][Tt][Aa][Ii][Nn][Ss]"
-    return t
-
-def t_NOT_CONTAINS(t):
-    r"[Nn][Oo][Tt]_[Cc][Oo][Nn][Tt][Aa][Ii][Nn][Ss]"
-    return t
-
-def t_STARTS_WITH(t):
-    r"[Ss][Tt][Aa][Rr][Tt][Ss]_[Ww][Ii][Tt][Hh]"
-    return t
-
-def t_ENDS_WITH(t):
-    r"[Ee][Nn][Dd][Ss]_[Ww][Ii][Tt][Hh]"
-    return t
-
-def t_ALPHANUM(t):
-    r"[Aa][Ll][Pp][Hh][Aa][Nn][Uu][Mm]"
-    return t
-
-def t_NUMERIC(t):
-    r"[Nn][Uu][Mm][Ee][Rr][Ii][Cc]"
-    return t
-
-def t_INTEGER(t):
-    r"[Ii][Nn][Tt][Ee][Gg][Ee][Rr]"
-    return t
-
-def t_FLOAT(t):
-    r"[Ff][Ll][Oo][Aa][Tt]"
-    return t
-
-def t_STRING_TYPE(t):
-    r"[Ss][Tt][Rr][Ii][Nn][Gg](_[Tt][Yy][Pp][Ee])?"
-    return t
-
-def t_REQUIRED(t):
-    r"[Rr][Ee][Qq][Uu][Ii][Rr][Ee][Dd]"
+# --- Keyword Token (Case Insensitive) ---
+# One word rule plus a dict lookup, instead of a [Xx][Yy]... regex per keyword.
+# 'STRING' is accepted as a short form of STRING_TYPE.
+_KEYWORD_TOKENS = dict(keywords, STRING="STRING_TYPE")
+
+def t_KEYWORD(t):
+    r"[A-Za-z_][A-Za-z0-9_]*"
+    t.type = _KEYWORD_TOKENS.get(t.value.upper())
+    if t.type is None:
+        # Reject the rule rather than dropping the word: "1C AND_1 > 5" or a
+        # glued "1C ISALPHANUM" must not parse as something else
+        raise lex.LexError(f"Unknown word '{t.value}' at position {t.lexpos}",
+                           t.lexer.lexdata[t.lexpos:])
     return t
 
 def t_COLUMN_REF(t):
@@ -165,9 +126,6 @@ precedence = (
     ("left", "MULTIPLY", "DIVIDE"),
 )
 
-# Global storage for parsed rules
-rules_list = []
-
 def p_rule_statement(p):
     """rule_statement : arithmetic_rule
     | datatype_rule
@@ -176,7 +134,8 @@ def p_rule_statement(p):
     | range_rule
     | validation_rule"""
     p[0] = p[1]
-    rules_list.append(p[1])
+    # Collected on the (per-interpreter) parser, not in a shared global
+    p.parser.parsed_rules.append(p[1])
 
 
 # 1. Arithmetic rule: 4C = 1C + 2C
@@ -280,6 +239,148 @@ def p_error(p):
         print("Syntax error")
 
 
+# Build the lexer and LALR parser once at import time. The parser loads its
+# tables from the committed 'parsetab' module instead of re-deriving them,
+# so creating interpreters is cheap. optimize=True skips PLY's signature
+# check, which hashes grammar docstrings and so differs across Python
+# versions; write_tables=False keeps imports from rewriting the tracked file.
+# After changing the grammar, regenerate parsetab.py with
+# yacc.yacc(write_tables=True, tabmodule="parsetab") and commit it.
+_LEXER = lex.lex()
+_PARSER = yacc.yacc(debug=False, optimize=True, write_tables=False, tabmodule="parsetab")
+
+
+# =============================================
+# COMPILED RULE HELPERS
+# =============================================
+
+def _never(value):
+    return False
+
+
+def _is_float(value):
+    try:
+        float(value)
+        return True
+    except:
+        return False
+
+
+# Numeric shapes: optional sign, digits with at most one decimal point
+_NUM_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)")
+_INT_RE = re.compile(r"-?\d+")
+
+# Datatype predicates, keyed by the DSL type name. Rows from load_data are
+# already typed, so ints short-circuit before any str() conversion.
+_DATATYPE_CHECKS = {
+    "alphanum": lambda value: str(value).isalnum(),
+    "numeric": lambda value: type(value) is int or _NUM_RE.fullmatch(str(value)) is not None,
+    "integer": lambda value: type(value) is int or _INT_RE.fullmatch(str(value)) is not None,
+    "float": _is_float,
+    "string_type": lambda value: isinstance(value, (str, int)),  # Flexible check
+}
+
+# Comparison operators; '=' and '!=' use a small tolerance for floats
+_NUMERIC_COMPARE = {
+    "=": lambda a, b: abs(a - b) < 0.001,
+    "!=": lambda a, b: abs(a - b) > 0.001,
+    ">": op.gt,
+    "<": op.lt,
+    ">=": op.ge,
+    "<=": op.le,
+}
+
+_STRING_COMPARE = {
+    "=": op.eq,
+    "!=": op.ne,
+}
+
+# Arithmetic operators; division by zero yields 0
+_ARITHMETIC = {
+    "+": op.add,
+    "-": op.sub,
+    "*": op.mul,
+    "/": lambda a, b: a / b if b != 0 else 0,
+}
+
+
+def _rule_column(rule):
+    """The column a rule validates (the target column for arithmetic)."""
+    return rule.get("target") if rule.get("type") == "arithmetic" else rule.get("column")
+
+
+def _compile_expression(expr, shared=None):
+    """
+    Compile an expression tree into a closure fn(data) -> value or None.
+    Column refs read data[N]; an int with no such column is a literal.
+    `shared` maps repr(subtree) -> closure for subtrees that occur in more
+    than one place; those are compiled once and memoised per row.
+    """
+    if isinstance(expr, int):
+        # An int *could* be a column index from the parser
+        if expr < 1:
+            return lambda data: expr
+
+        def column_or_literal(data):
+            try:
+                return data[expr]
+            except LookupError:
+                return expr
+        return column_or_literal
+    if isinstance(expr, float):
+        return lambda data: expr
+    if isinstance(expr, tuple) and expr[0] == "binary":
+        key = repr(expr)  # repr keeps column ref 1 and literal 1.0 apart
+        if shared is not None and shared.get(key):
+            return shared[key]
+        apply = _ARITHMETIC.get(expr[1])
+        if apply is None:
+            return lambda data: None
+        left = _compile_expression(expr[2], shared)
+        right = _compile_expression(expr[3], shared)
+
+        def evaluate(data):
+            try:
+                return apply(float(left(data)), float(right(data)))
+            except (ValueError, TypeError):
+                return None
+
+        if shared is not None and key in shared:
+            evaluate = shared[key] = _memoize_per_row(evaluate)
+        return evaluate
+    return lambda data: None
+
+
+def _memoize_per_row(evaluate):
+    """Cache a subexpression's value for the row it was last evaluated on."""
+    last = (None, None)
+
+    def memoized(data):
+        nonlocal last
+        row, value = last
+        if row is not data:
+            value = evaluate(data)
+            last = (data, value)
+        return value
+    return memoized
+
+
+def _shared_subexpressions(rules):
+    """
+    Find arithmetic subtrees used more than once across the rules.
+    Returns {repr(subtree): None} placeholders for _compile_expression.
+    """
+    counts = {}
+    stack = [rule["expression"] for rule in rules if rule.get("type") == "arithmetic"]
+    while stack:
+        expr = stack.pop()
+        if isinstance(expr, tuple) and expr[0] == "binary":
+            key = repr(expr)
+            counts[key] = counts.get(key, 0) + 1
+            stack.extend(expr[2:])
+    return {key: None for key, n in counts.items() if n > 1}
+
+
 # =============================================
 # RULE INTERPRETER CLASS
 # =============================================
@@ -288,27 +389,69 @@ class DSLInterpreter:
     """
     Main interpreter class.
     1. Parses rule strings into AST (Abstract Syntax Tree).
-    2. Validates data dictionaries against proper rules.
+    2. Validates data rows (dicts or load_data tuples) against the parsed rules.
     """
 
     def __init__(self):
-        global rules_list
-        rules_list = []
-        self.lexer = lex.lex()
-        self.parser = yacc.yacc(debug=False)
+        # Per-instance lexer and parser state over shared (read-only) tables.
+        # The LALR parser keeps its stacks on the parser object, so each
+        # interpreter gets its own shallow copy plus a lock for shared use.
+        self.lexer = _LEXER.clone()
+        self.parser = copy.copy(_PARSER)
+        self.parser.parsed_rules = []
+        self._parse_lock = threading.Lock()
+        # ruleset name -> (rule strings, rules, compiled checks)
+        self._ruleset_cache = {}
         self.rules = []
 
+    @property
+    def rules(self):
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        # Assigning a rule list (as the engine does per file) compiles it once
+        self._rules = list(rules)
+        shared = _shared_subexpressions(self._rules)
+        self._compiled_rules = [self.compile_rule(rule, shared) for rule in self._rules]
+
+    def use_ruleset(self, name, rule_strings):
+        """
+        Load a named ruleset as the active rules.
+        Parsed and compiled rules are reused while the ruleset's text is unchanged,
+        so edits elsewhere in the config don't force a re-parse.
+        """
+        key = tuple(rule_strings)
+        cached = self._ruleset_cache.get(name)
+        if cached is None or cached[0] != key:
+            self.rules = []
+            self.parse_multiple_rules("\n".join(key))
+            # Recompile as a whole ruleset so common subexpressions are shared
+            self.rules = self._rules
+            cached = (key, tuple(self._rules), tuple(self._compiled_rules))
+            self._ruleset_cache[name] = cached
+        # Copies, so later parse_rule() calls can't alter the cached entry
+        self._rules = list(cached[1])
+        self._compiled_rules = list(cached[2])
+        return self._rules
+
     def parse_rule(self, rule_text):
         """Parse a single line of rule text."""
-        global rules_list
-        rules_list = []
-
         try:
-            result = self.parser.parse(rule_text, lexer=self.lexer)
-            if rules_list:
-                rule = rules_list[0]
-                self.rules.append(rule)
-                return rule
+            # The appends stay under the lock too, so concurrent callers can't
+            # pair one rule with another rule's compiled check
+            with self._parse_lock:
+                self.parser.parsed_rules = []
+                result = self.parser.parse(rule_text, lexer=self.lexer)
+                parsed = self.parser.parsed_rules
+                rule = parsed[0] if parsed else None
+                if rule:
+                    # Compile MATCHES patterns once, at parse time
+                    if rule.get("type") == "pattern" and rule.get("operator") == "matches":
+                        rule["_compiled"] = re.compile(rule["pattern"])
+                    self._rules.append(rule)
+                    self._compiled_rules.append(self.compile_rule(rule))
+                    return rule
             return result
         except Exception as e:
             print(f"Error parsing rule: {e}")
@@ -328,184 +471,225 @@ class DSLInterpreter:
         return parsed_rules
 
     def evaluate_expression(self, expr, data):
-        """Recursive evaluation of arithmetic expressions."""
-        if isinstance(expr, (int, float)):
-            # If int, it *could* be a column index from the parser
-            if isinstance(expr, int) and expr in data:
-                return data.get(expr)
-            return expr
-        elif isinstance(expr, tuple):
-            if expr[0] == "binary":
-                op = expr[1]
-                left = self.evaluate_expression(expr[2], data)
-                right = self.evaluate_expression(expr[3], data)
-
-                try:
-                    left_num = float(left)
-                    right_num = float(right)
-
-                    if op == "+": return left_num + right_num
-                    elif op == "-": return left_num - right_num
-                    elif op == "*": return left_num * right_num
-                    elif op == "/": return left_num / right_num if right_num != 0 else 0
-                except (ValueError, TypeError):
-                    return None
-        return None
+        """
+        Evaluate an arithmetic expression tree against one row
+        (a row dict or a row tuple from load_data).
+        """
+        return _compile_expression(expr)(data)
 
     def validate_rule(self, rule, data):
         """
-        Executes a single parsed rule against a data row.
+        Executes a single parsed rule against a data row
+        (a row dict {1: val, ...} or a row tuple from load_data).
         Returns: {passed: bool, message: str}
         """
+        passed, message = self.compile_rule(rule)(data)
+        return {"passed": passed, "message": message}
+
+    def compile_rule(self, rule, shared=None):
+        """
+        Turn a parsed rule into a closure fn(data) -> (passed, message).
+        Rule fields are resolved once here instead of on every row.
+        `data` is a row dict {1: val, ...} or a row tuple from load_data,
+        where data[N] holds column NC (index 0 is a placeholder).
+        `shared` (from _shared_subexpressions) lets arithmetic rules reuse
+        common subexpressions across the ruleset.
+        """
         rule_type = rule.get("type")
 
-        # --- A. Arithmetic Validation ---
         if rule_type == "arithmetic":
-            target = rule["target"] # Target Column
-            expr = rule["expression"] # Expected Calculation
-
-            expected = self.evaluate_expression(expr, data)
-            actual = data.get(target)
+            target = rule["target"]
+            evaluate = _compile_expression(rule["expression"], shared)
 
-            if actual is None or expected is None:
-                return {"passed": False, "message": f"Missing data for calc on col {target}"}
-
-            try:
-                actual_num = float(actual)
-                expected_num = float(expected)
-                passed = abs(actual_num - expected_num) < 0.001
-            except (ValueError, TypeError):
-                return {"passed": False, "message": f"Non-numeric values in calc col {target}"}
-
-            return {"passed": passed, "message": f"Col {target}C = {actual}, Expected: {expected:.2f}"}
+            def check(data):
+                expected = evaluate(data)
+                try:
+                    actual = data[target]
+                except LookupError:
+                    actual = None
+                if actual is None or expected is None:
+                    return False, f"Missing data for calc on col {target}"
+                try:
+                    passed = abs(float(actual) - float(expected)) < 0.001
+                except (ValueError, TypeError):
+                    return False, f"Non-numeric values in calc col {target}"
+                return passed, f"Col {target}C = {actual}, Expected: {expected:.2f}"
+            return check
 
-        # --- B. Datatype Validation ---
-        elif rule_type == "datatype":
+        if rule_type == "datatype":
             column = rule["column"]
             expected_type = rule["datatype"]
-            value = data.get(column)
+            predicate = _DATATYPE_CHECKS.get(expected_type, _never)
 
-            if value is None:
-                return {"passed": False, "message": f"Column {column}C is empty"}
-
-            str_value = str(value)
-
-            if expected_type == "alphanum":
-                passed = str_value.isalnum()
-            elif expected_type == "numeric":
-                passed = str_value.replace(".", "", 1).replace("-", "", 1).isdigit()
-            elif expected_type == "integer":
-                passed = str_value.lstrip("-").isdigit()
-            elif expected_type == "float":
+            def check(data):
                 try:
-                    float(value)
-                    passed = True
-                except:
-                    passed = False
-            elif expected_type == "string_type":
-                passed = isinstance(value, str) or isinstance(value, int) # Flexible check
-            else:
-                passed = False
-
-            return {"passed": passed, "message": f"Col {column}C is {expected_type}: {passed}"}
-
-        # --- C. Comparison Validation ---
-        elif rule_type == "comparison":
+                    value = data[column]
+                except LookupError:
+                    value = None
+                if value is None:
+                    return False, f"Column {column}C is empty"
+                passed = predicate(value)
+                return passed, f"Col {column}C is {expected_type}: {passed}"
+            return check
+
+        if rule_type == "comparison":
             column = rule["column"]
             operator = rule["operator"]
             expected_value = rule["value"]
-            actual_value = data.get(column)
-
-            # Resolve expected value if it's a column reference
-            if isinstance(expected_value, int) and expected_value in data:
-                 expected_value = data.get(expected_value)
-
-            if actual_value is None:
-                return {"passed": False, "message": f"Column {column}C is empty"}
-
-            # Numeric comparison logic
+            compare = _NUMERIC_COMPARE.get(operator)
+            compare_str = _STRING_COMPARE.get(operator)
+            # Only an int literal can turn out to be a column reference
+            may_be_column = isinstance(expected_value, int) and expected_value >= 1
+            # Coerce the literal once; a non-numeric literal always compares as text
             try:
-                actual_num = float(actual_value)
-                expected_num = float(expected_value)
-
-                if operator == "=": passed = abs(actual_num - expected_num) < 0.001
-                elif operator == "!=": passed = abs(actual_num - expected_num) > 0.001
-                elif operator == ">": passed = actual_num > expected_num
-                elif operator == "<": passed = actual_num < expected_num
-                elif operator == ">=": passed = actual_num >= expected_num
-                elif operator == "<=": passed = actual_num <= expected_num
-                else: passed = False
+                literal_num = float(expected_value)
             except (ValueError, TypeError):
-                # Fallback to string comparison
-                actual_str = str(actual_value)
-                expected_str = str(expected_value)
-
-                if operator == "=": passed = actual_str == expected_str
-                elif operator == "!=": passed = actual_str != expected_str
-                else: passed = False
+                literal_num = None
 
-            return {"passed": passed, "message": f"Col {column}C ({actual_value}) {operator} {expected_value}"}
+            def check(data):
+                try:
+                    actual_value = data[column]
+                except LookupError:
+                    actual_value = None
+                if may_be_column and (
+                    expected_value < len(data) if type(data) is tuple else expected_value in data
+                ):
+                    expected = data[expected_value]
+                    try:
+                        expected_num = float(expected)
+                    except (ValueError, TypeError):
+                        expected_num = None
+                else:
+                    expected = expected_value
+                    expected_num = literal_num
+                if actual_value is None:
+                    return False, f"Column {column}C is empty"
+                message = f"Col {column}C ({actual_value}) {operator} {expected}"
+                if expected_num is not None:
+                    try:
+                        actual_num = float(actual_value)
+                        return (compare(actual_num, expected_num) if compare else False), message
+                    except (ValueError, TypeError):
+                        pass
+                # Fallback to string comparison
+                return (compare_str(str(actual_value), str(expected)) if compare_str else False), message
+            return check
 
-        # --- D. Pattern Matching ---
-        elif rule_type == "pattern":
+        if rule_type == "pattern":
             column = rule["column"]
             operator = rule["operator"]
             pattern = rule["pattern"]
-            value = str(data.get(column, ""))
-
+            message = f"Col {column}C {operator} '{pattern}'"
             if operator == "matches":
-                passed = bool(re.match(pattern, value))
+                regex = rule.get("_compiled") or re.compile(pattern)
+                test = lambda value: bool(regex.match(value))
             elif operator == "contains":
-                passed = pattern in value
+                test = lambda value: pattern in value
             elif operator == "not_contains":
-                passed = pattern not in value
+                test = lambda value: pattern not in value
             elif operator == "starts_with":
-                passed = value.startswith(pattern)
+                test = lambda value: value.startswith(pattern)
             elif operator == "ends_with":
-                passed = value.endswith(pattern)
+                test = lambda value: value.endswith(pattern)
             else:
-                passed = False
+                test = _never
 
-            return {"passed": passed, "message": f"Col {column}C {operator} '{pattern}'"}
+            def check(data):
+                try:
+                    value = data[column]
+                except LookupError:
+                    value = ""
+                return test(str(value)), message
+            return check
 
-        # --- E. Range Check ---
-        elif rule_type == "range":
+        if rule_type == "range":
             column = rule["column"]
             min_val = rule["min"]
             max_val = rule["max"]
-            value = data.get(column)
 
-            try:
-                v = float(value)
-                passed = min_val <= v <= max_val
-            except:
-                passed = False
-            
-            return {"passed": passed, "message": f"Col {column}C ({value}) between {min_val}-{max_val}"}
-
-        # --- F. Required Field ---
-        elif rule_type == "validation": # Type validation currently used for REQUIRED
-            column = rule["column"]
-            validation = rule["validation"]
-            value = data.get(column)
+            def check(data):
+                try:
+                    value = data[column]
+                except LookupError:
+                    value = None
+                try:
+                    passed = min_val <= float(value) <= max_val
+                except:
+                    passed = False
+                return passed, f"Col {column}C ({value}) between {min_val}-{max_val}"
+            return check
 
-            if validation == "required":
-                passed = value is not None and str(value).strip() != ""
-            else:
-                passed = False
+        if rule_type == "validation":
+            column = rule["column"]
+            message = f"Col {column}C Required"
+            if rule["validation"] != "required":
+                return lambda data: (False, message)
 
-            return {"passed": passed, "message": f"Col {column}C Required"}
+            def check(data):
+                try:
+                    value = data[column]
+                except LookupError:
+                    value = None
+                return value is not None and str(value).strip() != "", message
+            return check
 
-        return {"passed": False, "message": f"Unknown rule type: {rule_type}"}
+        message = f"Unknown rule type: {rule_type}"
+        return lambda data: (False, message)
 
     def validate_data(self, data):
         """Validate a full row against all loaded rules."""
         results = []
-        for rule in self.rules:
-            result = self.validate_rule(rule, data)
+        for rule, check in zip(self._rules, self._compiled_rules):
+            passed, message = check(data)
             results.append({
                 "rule": rule,
-                "passed": result["passed"],
-                "message": result["message"]
+                "passed": passed,
+                "message": message
             })
         return results
+
+    def iter_failures(self, rows, start=1):
+        """
+        Validate many rows in one pass and yield only the failures,
+        as (row_number, rule, message). Passing checks allocate nothing.
+
+        REQUIRED and datatype rules gate their column: once one fails on a
+        row, the column's remaining rules are skipped for that row, so a bad
+        cell reports one failure instead of a cascade. Failures keep rule order.
+        """
+        checks = list(zip(self._rules, self._compiled_rules))
+        columns = [_rule_column(rule) for rule in self._rules]
+        # Gate checks run first per row: REQUIRED before datatype
+        gates = [i for i, (rule, _) in enumerate(checks) if rule.get("type") == "validation"]
+        gates += [i for i, (rule, _) in enumerate(checks) if rule.get("type") == "datatype"]
+
+        if not gates:
+            for row_number, data in enumerate(rows, start):
+                for rule, check in checks:
+                    passed, message = check(data)
+                    if not passed:
+                        yield row_number, rule, message
+            return
+
+        gate_set = set(gates)
+        for row_number, data in enumerate(rows, start):
+            gate_failures = {}
+            blocked = set()
+            for i in gates:
+                if columns[i] in blocked:
+                    continue
+                passed, message = checks[i][1](data)
+                if not passed:
+                    gate_failures[i] = message
+                    blocked.add(columns[i])
+
+            for i, (rule, check) in enumerate(checks):
+                if i in gate_set:
+                    if i in gate_failures:
+                        yield row_number, rule, gate_failures[i]
+                    continue
+                if columns[i] in blocked:
+                    continue
+                passed, message = check(data)
+                if not passed:
+                    yield row_number, rule, message
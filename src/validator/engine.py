@@ -14,15 +14,45 @@ Author: Sriram
 Last Updated: Jan 2026
 """
 
+import atexit
 import csv
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from .config_manager import ConfigManager
 from .router import Router
 from .dsl import DSLInterpreter
 from .alerter import AlertManager
 from .logger import logger
 
+def _coerce(val: str) -> Any:
+    """
+    Strip a CSV cell and auto-detect numeric types (int, then float).
+    Obvious integers, decimals and words are decided without raising;
+    anything else goes through int()/float() so results match them exactly.
+    """
+    val = val.strip()
+    if not val:
+        return val
+    first = val[0]
+    digits = val[1:] if first in "+-" else val
+    if digits.isdecimal():
+        return int(val)
+    if digits.replace(".", "", 1).isdecimal():
+        return float(val)
+    # Words can't be numbers, except inf/infinity/nan spellings
+    if first.isalpha() and first not in "iInN":
+        return val
+    try:
+        return int(val)
+    except ValueError:
+        try:
+            return float(val)
+        except ValueError:
+            return val # Keep as string
+
+
 class ValidationEngine:
     """
     Main Orchestrator Class.
@@ -35,6 +65,8 @@ class ValidationEngine:
         self.router = Router(self.config_manager)
         self.interpreter = DSLInterpreter()
         self.alerter = AlertManager()
+        # Worker pool for process_files, started on first multi-file batch
+        self._pool = None
         
     def _configure_alerter(self):
         """
@@ -44,36 +76,30 @@ class ValidationEngine:
         sys_config = self.config_manager.get_system_config()
         self.alerter.configure(sys_config)
 
-    def load_data(self, filepath: str) -> List[Dict[int, Any]]:
+    def iter_rows(self, filepath: str) -> Iterator[Tuple[Any, ...]]:
         """
-        Reads input file (CSV/TXT) and converts it to a structured format.
+        Reads input file (CSV/TXT) lazily, one structured row at a time.
         
         Format:
-        Row 1 -> {1: "ValueCol1", 2: "ValueCol2", ...}
+        Row 1 -> (None, "ValueCol1", "ValueCol2", ...)
+        Index N holds column NC (1C, 2C...), so rules index rows directly;
+        index 0 is a placeholder.
         
         Supports automatic type inference (int/float) to simplify validation logic.
+        A read error is logged and ends the stream after the rows read so far.
         """
-        data = []
         try:
             with open(filepath, 'r', newline='') as f:
                 reader = csv.reader(f)
                 for row in reader:
                     # Map row items to 1-based column indices (1C, 2C...)
-                    item = {}
-                    for i, val in enumerate(row, 1):
-                        val = val.strip()
-                        # Auto-detect numeric types
-                        try:
-                            item[i] = int(val)
-                        except ValueError:
-                            try:
-                                item[i] = float(val)
-                            except ValueError:
-                                item[i] = val # Keep as string
-                    data.append(item)
+                    yield (None, *map(_coerce, row))
         except Exception as e:
             logger.error(f"Failed to read file {filepath}: {e}")
-        return data
+
+    def load_data(self, filepath: str) -> List[Tuple[Any, ...]]:
+        """Reads the whole input file into a list of rows (see iter_rows)."""
+        return list(self.iter_rows(filepath))
 
     def process_file(self, filepath: str):
         """
@@ -104,30 +130,27 @@ class ValidationEngine:
             logger.error(f"Ruleset {ruleset_name} is empty or not found.")
             return None
 
-        # 4. Parse Rules (using DSL)
-        rules_text = "\n".join(rule_strings)
-        parsed_rules = self.interpreter.parse_multiple_rules(rules_text)
-        self.interpreter.rules = parsed_rules 
+        # 4. Parse Rules (using DSL; cached until the ruleset's rules change)
+        self.interpreter.use_ruleset(ruleset_name, rule_strings)
         
-        # 5. Load Data
-        rows = self.load_data(filepath)
-        if not rows:
+        # 5. Load Data (streamed: each row is validated as it is read)
+        rows = self.iter_rows(filepath)
+        first_row = next(rows, None)
+        if first_row is None:
             logger.warning("No data found in file.")
             return None
+        rows = chain((first_row,), rows)
 
         # 6. Execute Validation
         all_failures = []
-        for i, row in enumerate(rows, 1):
-            # Interpreter evaluates one row against all rules
-            results = self.interpreter.validate_data(row)
-            
-            for res in results:
-                if not res["passed"]:
-                    # Capture detailed verification failure
-                    fail = res.copy()
-                    fail["row"] = i  # Add Row Number context
-                    fail.update(metadata)
-                    all_failures.append(fail)
+        # Interpreter runs every row through the compiled rules in one batch
+        # and only reports the checks that failed
+        for i, rule, message in self.interpreter.iter_failures(rows):
+            # Capture detailed verification failure
+            fail = {"rule": rule, "passed": False, "message": message}
+            fail["row"] = i  # Add Row Number context
+            fail.update(metadata)
+            all_failures.append(fail)
 
         # 7. Action / Alerting
         if all_failures:
@@ -137,3 +160,55 @@ class ValidationEngine:
         else:
             logger.info("Validation successful.")
             return True # PASSED
+
+    def process_files(self, filepaths: List[str], max_workers: Optional[int] = None) -> List[Optional[bool]]:
+        """
+        Validate a batch of independent files across worker processes.
+        Returns one process_file result per path, in the same order.
+        A file whose validation raises is logged and reported as None,
+        without affecting the rest of the batch.
+        A single file is validated in-process, skipping the IPC round trip.
+        """
+        if len(filepaths) <= 1:
+            return [self._process_file_safely(path) for path in filepaths]
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+            atexit.register(self._pool.shutdown)
+        # Workers load config.json themselves; make pending edits visible to them
+        self.config_manager.flush()
+        config_path = self.config_manager.config_path
+        # Workers keep their engine (and its cached rulesets) between files
+        futures = [self._pool.submit(run_in_worker, path, config_path) for path in filepaths]
+
+        results = []
+        for path, future in zip(filepaths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Validation of {path} failed: {e}")
+                results.append(None)
+        return results
+
+    def _process_file_safely(self, filepath: str) -> Optional[bool]:
+        """process_file, with any exception logged and reported as None."""
+        try:
+            return self.process_file(filepath)
+        except Exception as e:
+            logger.error(f"Validation of {filepath} failed: {e}")
+            return None
+
+
+# --- Worker Process Entry Point ---
+# One engine per worker process, built on first use (engines are not picklable).
+_worker_engine = None
+
+def run_in_worker(filepath: str, config_path: str = "config.json"):
+    """
+    Validate a file inside a process-pool worker.
+    Returns the same True/False/None result as ValidationEngine.process_file.
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = ValidationEngine(config_path)
+    return _worker_engine.process_file(filepath)
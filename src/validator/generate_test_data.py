@@ -14,90 +14,113 @@ Columns:
   7C-75C: Filler Strings
 """
 
-import csv
 import random
 import os
 import time
+from functools import lru_cache
+from operator import add
 
 OUTPUT_DIR = "input"
+ROWS_PER_FILE = 200
+WRITE_BUFFER = 1 << 20  # 1 MB, so each file goes out in a few large writes
+
+CURRENCIES = ("USD", "EUR", "GBP", "INR", "JPY")
+ACCT_TYPES = ("Savings", "Current", "Corporate")
+FILLER_VALUES = tuple(str(v) for v in range(100, 1000))
 
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
+@lru_cache(maxsize=None)
+def filler_prefixes(num_columns):
+    """Constant "Val_<col>_" prefixes for filler columns 7..num_columns."""
+    return tuple(f"Val_{i}_" for i in range(7, num_columns + 1))
+
 def generate_row(is_valid, num_columns=75):
     """
     Generates a single row of data.
     If is_valid is False, injects random errors into the strict fields.
     """
-    row = []
+    # Bound once per row; each draw below is then a local lookup
+    randint, rand, choice, uniform = random.randint, random.random, random.choice, random.uniform
+    # Sized up front; cells are filled by position
+    row = [None] * max(num_columns, 6)
     
     # --- Column 1: Transaction ID ---
     # Rule: Must start with "TXN"
     if is_valid:
-        row.append(f"TXN{random.randint(100000,999999)}")
+        row[0] = f"TXN{randint(100000,999999)}"
     else:
         # 50% chance to fail this specific rule
-        if random.random() < 0.5:
-            row.append("INVALID_ID")
+        if rand() < 0.5:
+            row[0] = "INVALID_ID"
         else:
-            row.append(f"TXN{random.randint(100000,999999)}")
+            row[0] = f"TXN{randint(100000,999999)}"
             
     # --- Column 2: Client Name ---
     # Rule: No strict validation, just needs to be present
-    row.append(f"Client_{random.randint(1,100)}")
+    row[1] = f"Client_{randint(1,100)}"
     
     # --- Column 3: Currency ---
     # Rule: Must match standard ISO codes
-    currencies = ["USD", "EUR", "GBP", "INR", "JPY"]
     if is_valid:
-        row.append(random.choice(currencies))
+        row[2] = choice(CURRENCIES)
     else:
         # Inject invalid currency code
-        if random.random() < 0.5:
-            row.append("BITCOIN") 
+        if rand() < 0.5:
+            row[2] = "BITCOIN" 
         else:
-            row.append(random.choice(currencies))
+            row[2] = choice(CURRENCIES)
             
     # --- Column 4: Amount ---
     # Rule: Must be a positive number
     if is_valid:
-        row.append(round(random.uniform(10, 10000), 2))
+        row[3] = round(uniform(10, 10000), 2)
     else:
         # Inject negative amount
-        if random.random() < 0.5:
-            row.append(-100.50)
+        if rand() < 0.5:
+            row[3] = -100.50
         else:
-            row.append(round(random.uniform(10, 10000), 2))
+            row[3] = round(uniform(10, 10000), 2)
             
     # --- Column 5: Account Type ---
     # Rule: Must be Savings, Current, or Corporate
-    acct_types = ["Savings", "Current", "Corporate"]
     if is_valid:
-        row.append(random.choice(acct_types))
+        row[4] = choice(ACCT_TYPES)
     else:
-        if random.random() < 0.3:
-            row.append("Unknown_Type")
+        if rand() < 0.3:
+            row[4] = "Unknown_Type"
         else:
-            row.append(random.choice(acct_types))
+            row[4] = choice(ACCT_TYPES)
 
     # --- Column 6: Risk Score ---
     # Rule: 0 to 100
     if is_valid:
-        row.append(random.randint(0, 100))
+        row[5] = randint(0, 100)
     else:
-        if random.random() < 0.3:
-            row.append(999) # Invalid score
+        if rand() < 0.3:
+            row[5] = 999 # Invalid score
         else:
-            row.append(random.randint(0, 100))
+            row[5] = randint(0, 100)
 
     # --- Columns 7-75: Filler Data ---
     # Used to test system performance with wide files
-    for i in range(7, num_columns + 1):
-        row.append(f"Val_{i}_{random.randint(100,999)}")
-        
+    # One batched draw for the whole block instead of a randint per cell
+    prefixes = filler_prefixes(num_columns)
+    values = random.choices(FILLER_VALUES, k=len(prefixes))
+    row[6:] = map(add, prefixes, values)
+
     return row
 
+def format_rows(rows):
+    """
+    Render rows as CSV text in one string, for a single write per file.
+    Generated cells never contain commas, quotes or newlines, so no quoting
+    is needed; lines end in CRLF like csv.writer's default.
+    """
+    return "".join(",".join(map(str, row)) + "\r\n" for row in rows)
+
 def generate_files():
     """Generates one Valid and one Invalid file in the output directory."""
     print(f"[Generator] Starting generation for target directory: {OUTPUT_DIR}")
@@ -109,10 +132,8 @@ def generate_files():
         fname_valid = f"Financial-Large-Valid-{timestamp}-{i}.txt"
         fpath_valid = os.path.join(OUTPUT_DIR, fname_valid)
         
-        with open(fpath_valid, "w", newline="") as f:
-            writer = csv.writer(f)
-            for _ in range(200): # 200 Rows
-                writer.writerow(generate_row(is_valid=True))
+        with open(fpath_valid, "w", newline="", buffering=WRITE_BUFFER) as f:
+            f.write(format_rows(generate_row(is_valid=True) for _ in range(ROWS_PER_FILE)))
         print(f"[Generator] Created Valid File:   {fname_valid}")
 
     # 2. Generate 3 Invalid Files
@@ -120,10 +141,8 @@ def generate_files():
         fname_invalid = f"Financial-Large-Invalid-{timestamp}-{i}.txt"
         fpath_invalid = os.path.join(OUTPUT_DIR, fname_invalid)
         
-        with open(fpath_invalid, "w", newline="") as f:
-            writer = csv.writer(f)
-            for _ in range(200): # 200 Rows
-                writer.writerow(generate_row(is_valid=False))
+        with open(fpath_invalid, "w", newline="", buffering=WRITE_BUFFER) as f:
+            f.write(format_rows(generate_row(is_valid=False) for _ in range(ROWS_PER_FILE)))
         print(f"[Generator] Created Invalid File: {fname_invalid}")
 
 if __name__ == "__main__":
@@ -5,33 +5,72 @@ Provides a consistent logging configuration across the application.
 Writes to both Console (Stdout) and File (validator.log).
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 
+# Loggers already configured, keyed by (name, log_file)
+_LOGGERS = {}
+
+def _start_listener(queue_handler, disk_handler):
+    """
+    Point queue_handler at a fresh queue drained by a new listener thread.
+    Threads don't survive fork(), so forked workers call this again.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler.queue = log_queue
+    listener = logging.handlers.QueueListener(log_queue, disk_handler)
+    listener.start()
+    # Drain queued records to disk before the interpreter exits
+    atexit.register(listener.stop)
+    return listener
+
+def _restart_in_child(queue_handler, disk_handler):
+    listener = _start_listener(queue_handler, disk_handler)
+    # multiprocessing children end with os._exit(), which skips atexit;
+    # its exit finalizers still run, so drain from there too
+    from multiprocessing import util
+    util.Finalize(listener, listener.stop, exitpriority=10)
+
 def setup_logger(name: str = "validator", log_file: str = "validator.log", level=logging.INFO):
     """
     Configures and returns a singleton-like logger.
+    Repeat calls with the same name and file return the cached instance.
     """
-    
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    
-    # 1. File Handler (Rotates logs? No, simple append for now)
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setFormatter(formatter)
-    
-    # 2. Console Handler
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setFormatter(formatter)
-    
+    key = (name, log_file)
+    if key in _LOGGERS:
+        return _LOGGERS[key]
+
     logger_instance = logging.getLogger(name)
     logger_instance.setLevel(level)
     
-    # Check handlers to avoid duplicate lines if called multiple times
+    # Check handlers to avoid duplicate lines if configured elsewhere
     if not logger_instance.handlers:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+
+        # 1. File Handler (Rotates logs? No, simple append for now)
+        # Opened on the first record, not at import time.
+        # Disk writes happen on a background listener thread; callers only enqueue.
+        disk_handler = logging.FileHandler(log_file, delay=True)
+        disk_handler.setFormatter(formatter)
+        file_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+
+        # 2. Console Handler
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+
         logger_instance.addHandler(file_handler)
         logger_instance.addHandler(stream_handler)
-        
+        _start_listener(file_handler, disk_handler)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(
+                after_in_child=lambda: _restart_in_child(file_handler, disk_handler)
+            )
+
+    _LOGGERS[key] = logger_instance
     return logger_instance
 
 # Global logger instance used by other modules
@@ -9,8 +9,9 @@ Example:
     Route: r"Financial-.*\.txt" -> "financial_rules"
 """
 
-import re
 import os
+import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Tuple
 from .config_manager import ConfigManager
 
@@ -19,8 +20,14 @@ class Router:
     Logic for mapping filenames -> rulesets.
     """
     
+    # Filenames remembered between config changes (watcher re-polls the same names)
+    CACHE_SIZE = 1024
+
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._cache_lock = threading.Lock()
 
     def route_file(self, filepath: str) -> Tuple[Optional[str], Dict]:
         """
@@ -34,14 +41,47 @@ class Router:
                               Returns (None, {}) if no match found.
         """
         filename = os.path.basename(filepath)
-        routes = self.config_manager.get_routes()
-        
-        # Iterate through routes (assumed sorted by priority in ConfigManager)
-        for route in routes:
-            pattern = route["pattern"]
-            
+
+        # Any config change invalidates every cached decision
+        version = self.config_manager.version
+        with self._cache_lock:
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+            cached = self._cache.get(filename)
+            if cached is not None:
+                self._cache.move_to_end(filename)
+
+        if cached is None:
+            cached = self._match(filename)
+            with self._cache_lock:
+                if self._cache_version == version:
+                    self._cache[filename] = cached
+                    if len(self._cache) > self.CACHE_SIZE:
+                        self._cache.popitem(last=False)
+
+        ruleset, metadata = cached
+        # Callers get their own copy of the metadata
+        return ruleset, dict(metadata)
+
+    def _match(self, filename: str) -> Tuple[Optional[str], Dict]:
+        """Run the configured routes against a bare filename (uncached)."""
+        # Fast path: all routes combined into one regex, tried in route order
+        matcher = self.config_manager.route_matcher()
+        if matcher is not None:
+            combined, routes = matcher
+            match = combined.match(filename)
+            if not match:
+                return None, {}
+            regex, route = routes[int(match.lastgroup[2:])]
+            # Named groups only exist on the route's own pattern
+            metadata = regex.search(filename).groupdict() if regex.groupindex else {}
+            return route["ruleset"], metadata
+
+        # Iterate through routes (pre-compiled, in config order)
+        for regex, route in self.config_manager.iter_compiled_routes():
             # Attempt Regex Match
-            match = re.search(pattern, filename)
+            match = regex.search(filename)
             if match:
                 # Capture regex named groups (e.g. (?P<date>\d+)) as metadata
                 metadata = match.groupdict()
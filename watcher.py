@@ -44,7 +44,12 @@ def move_file(filepath, dest_dir):
         dest_path = os.path.join(dest_dir, f"{base}_{timestamp}{ext}")
         
     try:
-        shutil.move(filepath, dest_path)
+        try:
+            # Same filesystem (the usual layout): one atomic rename
+            os.replace(filepath, dest_path)
+        except OSError:
+            # e.g. destination on another device: copy + delete
+            shutil.move(filepath, dest_path)
         logger.info(f"Moved {filename} -> {dest_path}")
     except Exception as e:
         logger.error(f"Failed to move {filename}: {e}")
@@ -59,22 +64,30 @@ def watch():
     
     # Initialize Engine once (it will reload config internally per file)
     engine = ValidationEngine("config.json")
+    # Resolved once; entries below are joined onto it, already absolute
+    input_abs = os.path.abspath(INPUT_DIR)
     
     while True:
         try:
-            # 1. Scan for files
-            files = [f for f in os.listdir(INPUT_DIR) if os.path.isfile(os.path.join(INPUT_DIR, f))]
-            
-            for filename in files:
-                filepath = os.path.join(INPUT_DIR, filename)
-                
-                # 2. Process
-                # engine.process_file returns:
-                # True  -> Validation Passed
-                # False -> Validation Failed
-                # None  -> System Error / No Route Found
-                result = engine.process_file(os.path.abspath(filepath))
-                
+            # 1. Scan for files (scandir reports the entry type without a stat per file)
+            with os.scandir(INPUT_DIR) as entries:
+                found = [entry for entry in entries if entry.is_file()]
+
+            if not found:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            files = [entry.name for entry in found]
+            filepaths = [os.path.join(input_abs, name) for name in files]
+
+            # 2. Process (files in a batch are validated in parallel)
+            # engine.process_files returns one result per file:
+            # True  -> Validation Passed
+            # False -> Validation Failed
+            # None  -> System Error / No Route Found
+            results = engine.process_files(filepaths)
+
+            for filename, filepath, result in zip(files, filepaths, results):
                 # 3. Route Output
                 if result is True:
                     move_file(filepath, PROCESSED_DIR)